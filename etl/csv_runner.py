@@ -1,13 +1,34 @@
 """
 Simple CSV processing ETL runner without pandas/numpy dependencies.
+
+When PyArrow is installed the CSV is streamed and filtered in record batches;
+otherwise the runner falls back to the standard library csv module.
 """
+import io
 import os
+import re
 import sys
 import csv
 import logging
 import shutil
+import tempfile
+import threading
+import functools
 from datetime import datetime
 
+from etl.uring_reader import open_uring
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+else:
+    # Let Arrow parse and filter on every available core
+    pa.set_cpu_count(os.cpu_count() or 1)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -15,13 +36,359 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_csv_etl(input_path=None, output_path=None):
+# Number of output rows returned for preview
+SAMPLE_SIZE = 5
+
+# Supported output file formats
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# Buffer size for CSV file reads and writes
+CSV_BUFSIZE = 1 << 20
+
+# Maximum number of rows per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 131072
+
+# UTF-8 encodings of every character str.strip() removes, apart from the
+# line endings \r and \n
+UNICODE_BLANK = (
+    rb'(?:[ \t\f\v\x1c-\x1f]|\xc2[\x85\xa0]|\xe1\x9a\x80'
+    rb'|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)'
+)
+
+# A line whose first field is blank, including its line ending. The
+# lookbehind stops a match at the very end of input after the last newline.
+EMPTY_FIRST_FIELD = re.compile(
+    rb'^' + UNICODE_BLANK + rb'*(?:,[^\n]*)?(?:\r?\n|(?<=[^\n])\Z)', re.MULTILINE
+)
+
+def _filter_with_arrow(input_path, output_path, header, output_format="csv"):
+    """
+    Filter out rows with an empty ImageID using PyArrow's streaming CSV reader.
+    
+    Rows with a different number of fields than the header cannot be put in a
+    record batch. Those without an ImageID are counted as filtered; any other
+    such row, or any other input Arrow cannot parse, makes the caller fall
+    back to the csv module, which keeps them.
+    
+    Args:
+        input_path (str): Path to input CSV file
+        output_path (str): Path to write output file
+        header (list): Column names read from the input file
+        output_format (str, optional): Output file format, "csv" or "parquet"
+    
+    Returns:
+        tuple: (initial_count, transformed_count, filtered_count, sample_rows),
+            or None if the file needs the csv module
+    """
+    initial_count = 0
+    transformed_count = 0
+    invalid_count = 0
+    sample_rows = []
+    imageid_index = header.index('ImageID')
+    
+    def handle_invalid_row(row):
+        nonlocal invalid_count
+        fields = next(csv.reader([row.text]), [])
+        if imageid_index < len(fields) and fields[imageid_index].strip():
+            return 'error'
+        invalid_count += 1
+        return 'skip'
+    
+    try:
+        # Arrow reads the path natively with its own readahead; handing it a
+        # Python file object makes pyarrow abort at interpreter exit
+        reader = pacsv.open_csv(
+            input_path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=16 << 20),
+            # Blank lines are rows too and quoted values may span lines, as
+            # they can for the csv module
+            parse_options=pacsv.ParseOptions(
+                invalid_row_handler=handle_invalid_row,
+                ignore_empty_lines=False,
+                newlines_in_values=True
+            ),
+            # Keep every column as a string, as the csv module would
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in header}
+            ),
+        )
+        
+        if output_format == "parquet":
+            writer = pq.ParquetWriter(
+                output_path,
+                reader.schema,
+                compression='zstd',
+                compression_level=1,
+                use_dictionary=True
+            )
+            write_batch = functools.partial(
+                writer.write_batch,
+                row_group_size=PARQUET_ROW_GROUP_SIZE
+            )
+        else:
+            write_options = pacsv.WriteOptions(batch_size=65536)
+            writer = pacsv.CSVWriter(output_path, reader.schema, write_options=write_options)
+            write_batch = writer.write_batch
+        
+        with writer:
+            for batch in reader:
+                image_ids = batch.column('ImageID')
+                mask = pc.and_(
+                    pc.is_valid(image_ids),
+                    pc.not_equal(pc.utf8_trim_whitespace(image_ids), '')
+                )
+                filtered = batch.filter(mask)
+                write_batch(filtered)
+                
+                initial_count += batch.num_rows
+                transformed_count += filtered.num_rows
+                
+                # Collect sample rows (up to SAMPLE_SIZE)
+                if len(sample_rows) < SAMPLE_SIZE:
+                    sample_rows.extend(
+                        filtered.slice(0, SAMPLE_SIZE - len(sample_rows)).to_pylist()
+                    )
+    except pa.ArrowInvalid as e:
+        # The csv module accepts anything Arrow rejects, including rows with
+        # a mismatched column count
+        logger.info(f"PyArrow could not parse the input, using the csv module: {e}")
+        return None
+    
+    initial_count += invalid_count
+    filtered_count = initial_count - transformed_count
+    return initial_count, transformed_count, filtered_count, sample_rows
+
+def _filter_with_bytes(input_path, output_path, header):
+    """
+    Filter out rows with an empty ImageID with a single regex pass over raw bytes.
+    
+    Only used when ImageID is the first column and the file has no quoted
+    fields or bare carriage returns, so every line is exactly one row.
+    
+    Args:
+        input_path (str): Path to input CSV file
+        output_path (str): Path to write output CSV
+        header (list): Column names read from the input file
+    
+    Returns:
+        tuple: (initial_count, transformed_count, filtered_count, sample_rows),
+            or None if the file needs the csv module
+    """
+    with open_uring(input_path, block_size=CSV_BUFSIZE) as infile:
+        data = infile.read()
+    
+    if b'"' in data or data.count(b'\r') != data.count(b'\r\n'):
+        return None
+    
+    header_end = data.find(b'\n') + 1 or len(data)
+    # A view avoids copying everything after the header
+    body = memoryview(data)[header_end:]
+    initial_count = data.count(b'\n', header_end) + (
+        1 if body and not data.endswith(b'\n') else 0
+    )
+    
+    kept, filtered_count = EMPTY_FIRST_FIELD.subn(b'', body)
+    transformed_count = initial_count - filtered_count
+    
+    with open(output_path, 'wb') as outfile:
+        outfile.write(data[:header_end])
+        outfile.write(kept)
+    
+    # Parse the first kept lines for preview
+    sample_lines = kept.split(b'\n', SAMPLE_SIZE)[:SAMPLE_SIZE]
+    sample_rows = []
+    for row in csv.reader(line.decode() for line in sample_lines if line):
+        sample_rows.append({col: row[i] if i < len(row) else "" for i, col in enumerate(header)})
+    
+    return initial_count, transformed_count, filtered_count, sample_rows
+
+def _filter_with_csv(input_path, output_path, header):
+    """
+    Filter out rows with an empty ImageID using the standard library csv module.
+    
+    Kept records are copied to the output exactly as they appear in the input,
+    so rows are only parsed, never re-serialised.
+    
+    Args:
+        input_path (str): Path to input CSV file
+        output_path (str): Path to write output CSV
+        header (list): Column names read from the input file
+    
+    Returns:
+        tuple: (initial_count, transformed_count, filtered_count, sample_rows)
+    """
+    transformed_count = 0
+    filtered_count = 0
+    sample_rows = []
+    imageid_index = header.index('ImageID')
+    
+    # Source lines consumed by the csv reader for the current record, which
+    # may span several lines when a quoted field contains a newline
+    record_lines = []
+    
+    def recorded(lines):
+        for line in lines:
+            record_lines.append(line)
+            yield line
+    
+    with io.TextIOWrapper(open_uring(input_path, block_size=CSV_BUFSIZE), newline='') as infile, \
+            open(output_path, 'w', newline='', buffering=CSV_BUFSIZE) as outfile:
+        reader = csv.reader(recorded(infile))
+        write = outfile.write
+        
+        # Copy the header
+        next(reader)
+        write(''.join(record_lines))
+        record_lines.clear()
+        
+        # Process rows until enough samples have been collected
+        for row in reader:
+            # Skip rows with empty ImageID
+            if imageid_index < len(row) and row[imageid_index].strip():
+                write(''.join(record_lines))
+                transformed_count += 1
+                
+                sample_row = {}
+                for i, col in enumerate(header):
+                    if i < len(row):
+                        sample_row[col] = row[i]
+                    else:
+                        sample_row[col] = ""
+                sample_rows.append(sample_row)
+                if len(sample_rows) == SAMPLE_SIZE:
+                    record_lines.clear()
+                    break
+            else:
+                filtered_count += 1
+            record_lines.clear()
+        
+        # Process the remaining rows without the sampling branch
+        for row in reader:
+            if imageid_index < len(row) and row[imageid_index].strip():
+                write(''.join(record_lines))
+                transformed_count += 1
+            else:
+                filtered_count += 1
+            record_lines.clear()
+    
+    initial_count = transformed_count + filtered_count
+    return initial_count, transformed_count, filtered_count, sample_rows
+
+def _filter_with_csv_to_parquet(input_path, output_path, header):
+    """
+    Filter out rows with an empty ImageID using the csv module and write Parquet.
+    
+    Used when Arrow cannot parse the input. Short rows are padded with empty
+    strings to the header width, as in the sample rows, so the same rows are
+    kept as for CSV output.
+    
+    Args:
+        input_path (str): Path to input CSV file
+        output_path (str): Path to write output Parquet file
+        header (list): Column names read from the input file
+    
+    Returns:
+        tuple: (initial_count, transformed_count, filtered_count, sample_rows)
+    
+    Raises:
+        ValueError: If a kept row has more fields than the header
+    """
+    transformed_count = 0
+    filtered_count = 0
+    sample_rows = []
+    imageid_index = header.index('ImageID')
+    width = len(header)
+    schema = pa.schema([(name, pa.string()) for name in header])
+    columns = [[] for _ in header]
+    
+    def write_row_group(writer):
+        writer.write_batch(
+            pa.record_batch(columns, schema=schema),
+            row_group_size=PARQUET_ROW_GROUP_SIZE
+        )
+        for column in columns:
+            column.clear()
+    
+    with io.TextIOWrapper(open_uring(input_path, block_size=CSV_BUFSIZE), newline='') as infile, \
+            pq.ParquetWriter(
+                output_path,
+                schema,
+                compression='zstd',
+                compression_level=1,
+                use_dictionary=True
+            ) as writer:
+        reader = csv.reader(infile)
+        
+        # Skip the header
+        next(reader)
+        
+        for row in reader:
+            # Skip rows with empty ImageID
+            if not (imageid_index < len(row) and row[imageid_index].strip()):
+                filtered_count += 1
+                continue
+            
+            if len(row) > width:
+                raise ValueError(
+                    f"Line {reader.line_num} has {len(row)} fields but the header has {width}"
+                )
+            row += [""] * (width - len(row))
+            
+            for column, value in zip(columns, row):
+                column.append(value)
+            transformed_count += 1
+            
+            if len(sample_rows) < SAMPLE_SIZE:
+                sample_rows.append(dict(zip(header, row)))
+            if len(columns[0]) == PARQUET_ROW_GROUP_SIZE:
+                write_row_group(writer)
+        
+        if columns[0]:
+            write_row_group(writer)
+    
+    initial_count = transformed_count + filtered_count
+    return initial_count, transformed_count, filtered_count, sample_rows
+
+def _link_latest(output_path, fixed_output_path):
+    """
+    Atomically point fixed_output_path at output_path without copying data.
+    
+    Uses a hard link where possible, then a symlink, and only copies the file
+    on filesystems that support neither.
+    
+    Args:
+        output_path (str): Path of the file just written
+        fixed_output_path (str): Stable alias to update
+    """
+    # Already linked, e.g. when a caller rewrites the same output_path
+    if os.path.exists(fixed_output_path) and os.path.samefile(output_path, fixed_output_path):
+        return
+    
+    # Unique per process and thread so overlapping runs never touch each
+    # other's temporary link
+    tmp_path = f"{fixed_output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    
+    try:
+        os.link(output_path, tmp_path)
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(output_path), tmp_path)
+        except OSError:
+            shutil.copy(output_path, tmp_path)
+    
+    os.replace(tmp_path, fixed_output_path)
+
+def run_csv_etl(input_path=None, output_path=None, output_format="csv"):
     """
     Run a simple CSV ETL pipeline without pandas or numpy.
     
     Args:
         input_path (str, optional): Path to input CSV file
-        output_path (str, optional): Path to write output CSV
+        output_path (str, optional): Path to write output file
+        output_format (str, optional): Output file format, "csv" or "parquet".
+            Parquet output requires PyArrow.
     
     Returns:
         dict: Dictionary with ETL statistics and results
@@ -39,11 +406,29 @@ def run_csv_etl(input_path=None, output_path=None):
             "timestamp": datetime.now().isoformat()
         }
     
+    # Ensure the output format can be written
+    if output_format not in OUTPUT_FORMATS:
+        logger.error(f"Unsupported output format: {output_format}")
+        return {
+            "success": False,
+            "error": f"Unsupported output format: {output_format}",
+            "timestamp": datetime.now().isoformat()
+        }
+    if output_format == "parquet" and pa is None:
+        logger.error("Parquet output requires pyarrow")
+        return {
+            "success": False,
+            "error": "Parquet output requires pyarrow",
+            "timestamp": datetime.now().isoformat()
+        }
+    
     if output_path is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_dir = f"data/output/csv_{timestamp}"
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, "processed_data.csv")
+        # A fresh directory per run, so a run never rewrites an earlier output
+        # that the latest_processed alias may still point at
+        os.makedirs("data/output", exist_ok=True)
+        output_dir = tempfile.mkdtemp(prefix=f"csv_{timestamp}_", dir="data/output")
+        output_path = os.path.join(output_dir, f"processed_data.{output_format}")
     else:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
@@ -52,55 +437,34 @@ def run_csv_etl(input_path=None, output_path=None):
     logger.info(f"Output path: {output_path}")
     
     try:
-        # Process the CSV file
-        initial_count = 0
-        transformed_count = 0
-        filtered_count = 0
-        sample_rows = []
+        # Read the header
+        with open(input_path, 'r', newline='') as infile:
+            header = next(csv.reader(infile), [])
         
-        with open(input_path, 'r', newline='') as infile, open(output_path, 'w', newline='') as outfile:
-            reader = csv.reader(infile)
-            writer = csv.writer(outfile)
-            
-            # Read the header
-            header = next(reader)
-            writer.writerow(header)
-            
-            # Find the index of the ImageID column
-            try:
-                imageid_index = header.index('ImageID')
-            except ValueError:
-                logger.error("CSV file does not contain an 'ImageID' column")
-                return {
-                    "success": False,
-                    "error": "CSV file does not contain an 'ImageID' column",
-                    "timestamp": datetime.now().isoformat()
-                }
-            
-            # Process rows
-            for row in reader:
-                initial_count += 1
-                
-                # Skip rows with empty ImageID
-                if imageid_index < len(row) and row[imageid_index].strip():
-                    writer.writerow(row)
-                    transformed_count += 1
-                    
-                    # Collect sample rows (up to 5)
-                    if transformed_count <= 5:
-                        sample_row = {}
-                        for i, col in enumerate(header):
-                            if i < len(row):
-                                sample_row[col] = row[i]
-                            else:
-                                sample_row[col] = ""
-                        sample_rows.append(sample_row)
-                else:
-                    filtered_count += 1
+        # Ensure the ImageID column is present
+        if 'ImageID' not in header:
+            logger.error("CSV file does not contain an 'ImageID' column")
+            return {
+                "success": False,
+                "error": "CSV file does not contain an 'ImageID' column",
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        # Process the CSV file
+        counts = None
+        if pa is not None:
+            counts = _filter_with_arrow(input_path, output_path, header, output_format)
+        elif header[0] == 'ImageID':
+            counts = _filter_with_bytes(input_path, output_path, header)
+        if counts is None and output_format == "parquet":
+            counts = _filter_with_csv_to_parquet(input_path, output_path, header)
+        elif counts is None:
+            counts = _filter_with_csv(input_path, output_path, header)
+        initial_count, transformed_count, filtered_count, sample_rows = counts
         
-        # Create a copy in the data/output directory directly for easy reference
-        fixed_output_path = "data/output/latest_processed.csv"
-        shutil.copy(output_path, fixed_output_path)
+        # Point a fixed path in the data/output directory at the output for easy reference
+        fixed_output_path = f"data/output/latest_processed.{output_format}"
+        _link_latest(output_path, fixed_output_path)
         
         logger.info(f"ETL pipeline completed at {datetime.now()}")
         logger.info(f"Initial row count: {initial_count}")
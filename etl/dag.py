@@ -4,13 +4,14 @@ Prefect flow to orchestrate the ETL pipeline.
 import os
 import logging
 import sys
+import argparse
 from datetime import datetime
 
 # Ensure the project root is in the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from prefect import flow, task
-from prefect.task_runners import SequentialTaskRunner
+from prefect.task_runners import ConcurrentTaskRunner
 
 from etl.ingest import ingest
 from etl.expectations.expectations import (
@@ -35,7 +36,7 @@ def run_etl(input_path=None, output_path=None):
         output_path (str, optional): Path to write Parquet output
     
     Returns:
-        tuple: (spark_session, output_path) for validation
+        tuple: (spark_session, output_path, stats, df) for validation
     """
     logger.info("Starting ETL process")
     return ingest(input_path, output_path)
@@ -52,26 +53,30 @@ def setup_expectations():
     return setup_default_expectations_suite()
 
 @task(name="Validate Data")
-def validate_data(etl_result, ge_setup):
+def validate_data(etl_result, ge_setup, build_docs=False):
     """
     Task to validate the ETL output using Great Expectations.
     
     Args:
-        etl_result (tuple): (spark_session, output_path) from ETL task
+        etl_result (tuple): (spark_session, output_path, stats, df) from ETL task
         ge_setup (tuple): (context, suite_name) from setup task
+        build_docs (bool, optional): Build data docs even if validation passes
     
     Returns:
         bool: True if validation passes, raises exception otherwise
     """
     logger.info("Starting data validation")
-    spark_session, output_path = etl_result
+    spark_session, output_path, stats, df = etl_result
+    logger.info(f"ETL statistics: {stats}")
     context, suite_name = ge_setup
     
     validation_result = validate_parquet_data(
         output_path,
         spark_session,
         context,
-        suite_name
+        suite_name,
+        df=df,
+        build_docs=build_docs
     )
     
     if not validation_result.success:
@@ -84,15 +89,17 @@ def validate_data(etl_result, ge_setup):
 @flow(
     name="ETL Pipeline",
     description="End-to-end ETL pipeline with data validation",
-    task_runner=SequentialTaskRunner(),
+    task_runner=ConcurrentTaskRunner(),
 )
-def etl_pipeline(input_path=None, output_path=None):
+def etl_pipeline(input_path=None, output_path=None, build_docs=False):
     """
     Prefect flow to orchestrate the ETL pipeline.
     
     Args:
         input_path (str, optional): Path to input CSV file
         output_path (str, optional): Path to write Parquet output
+        build_docs (bool, optional): Build Great Expectations data docs even if
+            validation passes
     
     Returns:
         bool: True if the pipeline runs successfully
@@ -108,17 +115,17 @@ def etl_pipeline(input_path=None, output_path=None):
     logger.info(f"Input path: {input_path}")
     logger.info(f"Output path: {output_path}")
     
-    # Run ETL task
-    etl_result = run_etl(input_path, output_path)
+    # Run ETL and set up expectations concurrently, they do not depend on each other
+    etl_future = run_etl.submit(input_path, output_path)
+    ge_future = setup_expectations.submit()
     
-    # Setup expectations
-    ge_setup = setup_expectations()
-    
-    # Validate data
-    validation_success = validate_data(etl_result, ge_setup)
+    # Validate data once both have finished
+    etl_result = etl_future.result()
+    ge_setup = ge_future.result()
+    validation_success = validate_data(etl_result, ge_setup, build_docs)
     
     # Clean up Spark session
-    spark_session, _ = etl_result
+    spark_session, _, _, _ = etl_result
     spark_session.stop()
     
     logger.info(f"ETL pipeline completed at {datetime.now()}")
@@ -126,4 +133,8 @@ def etl_pipeline(input_path=None, output_path=None):
 
 if __name__ == "__main__":
     # When run directly, execute the ETL pipeline
-    etl_pipeline()
+    parser = argparse.ArgumentParser(description="Run the ETL pipeline Prefect flow")
+    parser.add_argument("--build-docs", action="store_true",
+                        help="Build Great Expectations data docs even if validation passes")
+    args = parser.parse_args()
+    etl_pipeline(build_docs=args.build_docs)
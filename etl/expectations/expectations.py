@@ -19,6 +19,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# (context, suite_name) from the first setup in this process, reused by later
+# pipeline runs. Set SPARKETL_GE_NO_CACHE to rebuild the context every time.
+_GE_CONTEXT_CACHE = None
+
 def initialize_data_context():
     """
     Initialize a Great Expectations data context with default configuration.
@@ -166,28 +170,44 @@ def setup_default_expectations_suite():
     """
     Set up the default expectations suite for the ETL pipeline.
     
+    The result is cached for the lifetime of the process unless the
+    SPARKETL_GE_NO_CACHE environment variable is set.
+    
     Returns:
         tuple: (context, suite_name) for validation
     """
+    global _GE_CONTEXT_CACHE
+    use_cache = not os.environ.get("SPARKETL_GE_NO_CACHE")
+    if use_cache and _GE_CONTEXT_CACHE is not None:
+        logger.info("Using cached expectations suite")
+        return _GE_CONTEXT_CACHE
+    
     logger.info("Setting up default expectations suite")
     
     # Initialize data context
     context = initialize_data_context()
     
-    # Create or get suite
     suite_name = "parquet_output_suite"
-    suite = create_expectation_suite(context, suite_name)
-    
-    # Add expectations to the suite
-    suite = add_expectations_to_suite(suite)
-    
-    # Save the suite
-    context.save_expectation_suite(suite)
-    logger.info(f"Expectation suite '{suite_name}' saved")
-    
+    if suite_name in context.list_expectation_suite_names():
+        # The suite was saved by an earlier run, so there is nothing to add
+        logger.info(f"Using existing expectation suite: {suite_name}")
+    else:
+        # Create the suite
+        suite = create_expectation_suite(context, suite_name)
+        
+        # Add expectations to the suite
+        suite = add_expectations_to_suite(suite)
+        
+        # Save the suite
+        context.save_expectation_suite(suite)
+        logger.info(f"Expectation suite '{suite_name}' saved")
+    
+    if use_cache:
+        _GE_CONTEXT_CACHE = (context, suite_name)
     return context, suite_name
 
-def validate_parquet_data(parquet_path, spark_session, context=None, suite_name=None):
+def validate_parquet_data(parquet_path, spark_session, context=None, suite_name=None, df=None,
+                          build_docs=False):
     """
     Validate the Parquet data using Great Expectations.
     
@@ -196,6 +216,10 @@ def validate_parquet_data(parquet_path, spark_session, context=None, suite_name=
         spark_session: Spark session to use for reading data
         context (BaseDataContext, optional): GE context. If None, a new one is created.
         suite_name (str, optional): Name of the suite to use. If None, default is used.
+        df (DataFrame, optional): Already loaded data to validate. If None, the
+            Parquet files are read from parquet_path.
+        build_docs (bool, optional): Build data docs even if validation passes.
+            Docs are always built when validation fails.
     
     Returns:
         ValidationResult: The result of the validation
@@ -206,8 +230,9 @@ def validate_parquet_data(parquet_path, spark_session, context=None, suite_name=
     if context is None or suite_name is None:
         context, suite_name = setup_default_expectations_suite()
     
-    # Load Parquet data as Spark DataFrame
-    df = spark_session.read.parquet(parquet_path)
+    # Load Parquet data as Spark DataFrame unless the caller already has it
+    if df is None:
+        df = spark_session.read.parquet(parquet_path)
     
     # Convert to GE DataFrame
     ge_df = ge.dataset.SparkDFDataset(df)
@@ -231,9 +256,10 @@ def validate_parquet_data(parquet_path, spark_session, context=None, suite_name=
     validation_result = validator.validate()
     logger.info(f"Validation completed with success: {validation_result.success}")
     
-    # Save validation result and build data docs
-    context.build_data_docs()
-    logger.info("Data docs generated")
+    # Build data docs only when they are needed
+    if build_docs or not validation_result.success:
+        context.build_data_docs()
+        logger.info("Data docs generated")
     
     return validation_result
 
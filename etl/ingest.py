@@ -5,6 +5,7 @@ import os
 import logging
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import col
+from pyspark.sql.types import StructType, StructField, StringType
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +14,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Schema of the labels CSV. Confidence stays a string to match the
+# expectation suite in etl/expectations/expectations.py.
+LABELS_SCHEMA = StructType([
+    StructField("ImageID", StringType(), True),
+    StructField("LabelName", StringType(), True),
+    StructField("Confidence", StringType(), True),
+])
+
+# Rows that do not fit LABELS_SCHEMA keep their raw text here so they can be
+# counted and dropped instead of vanishing silently
+CORRUPT_RECORD_COLUMN = "_corrupt_record"
+
+# Spread file splits and shuffles over all local cores
+SPARK_PARALLELISM = (os.cpu_count() or 1) * 2
+
 def initialize_spark():
     """Initialize and return a SparkSession for local processing."""
     logger.info("Initializing Spark session")
@@ -25,6 +41,17 @@ def initialize_spark():
         .config("spark.driver.memory", "2g")
         .config("spark.executor.memory", "2g")
         .config("spark.ui.enabled", "false")
+        # Split CSV input into small partitions so every core gets work
+        .config("spark.sql.files.maxPartitionBytes", "16m")
+        .config("spark.sql.files.openCostInBytes", "1m")
+        .config("spark.default.parallelism", str(SPARK_PARALLELISM))
+        .config("spark.sql.shuffle.partitions", str(SPARK_PARALLELISM))
+        .config("spark.sql.csv.filterPushdown.enabled", "true")
+        # Keep the columnar and code-generated execution paths on
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+        .config("spark.sql.csv.parser.columnPruning.enabled", "true")
+        .config("spark.sql.parquet.enableVectorizedReader", "true")
+        .config("spark.sql.codegen.wholeStage", "true")
         .getOrCreate()
     )
     # Set log level for Spark
@@ -41,7 +68,10 @@ def ingest(input_path=None, output_path=None):
         output_path (str, optional): Path to output directory. Defaults to data/output/parquet.
     
     Returns:
-        tuple: (spark_session, output_path) for further processing
+        tuple: (spark_session, output_path, stats, filtered_df) for further
+            processing, where stats holds the initial, transformed, filtered and
+            malformed row counts and filtered_df is the cached DataFrame that
+            was written
     """
     # Default paths
     if input_path is None:
@@ -63,27 +93,66 @@ def ingest(input_path=None, output_path=None):
     try:
         # Read CSV data
         logger.info(f"Reading CSV from {input_path}")
-        df = spark.read.option("header", "true").csv(input_path)
+        df = (
+            spark.read
+            .schema(StructType(
+                LABELS_SCHEMA.fields + [StructField(CORRUPT_RECORD_COLUMN, StringType(), True)]
+            ))
+            .option("header", "true")
+            # Check the header against the schema instead of ignoring it
+            .option("enforceSchema", "false")
+            .option("mode", "PERMISSIVE")
+            .option("columnNameOfCorruptRecord", CORRUPT_RECORD_COLUMN)
+            .option("multiLine", "false")
+            .csv(input_path)
+        )
         
-        # Log initial data stats
-        total_rows = df.count()
+        # Count total, malformed and null ImageID rows in a single pass over the input
+        row_counts = {
+            (row["malformed"], row["null_image_id"]): row["count"]
+            for row in (
+                df.groupBy(
+                    col(CORRUPT_RECORD_COLUMN).isNotNull().alias("malformed"),
+                    col("ImageID").isNull().alias("null_image_id"),
+                )
+                .count()
+                .collect()
+            )
+        }
+        malformed_rows = row_counts.get((True, True), 0) + row_counts.get((True, False), 0)
+        removed_rows = row_counts.get((False, True), 0)
+        filtered_rows = row_counts.get((False, False), 0)
+        total_rows = malformed_rows + removed_rows + filtered_rows
         logger.info(f"Initial row count: {total_rows}")
+        if malformed_rows:
+            logger.warning(f"Dropping {malformed_rows} malformed rows that do not match the schema")
         
-        # Filter out null ImageID records
+        # Filter out malformed and null ImageID records
         logger.info("Filtering out null ImageID records")
-        filtered_df = df.filter(col("ImageID").isNotNull())
-        
-        # Log filtered data stats
-        filtered_rows = filtered_df.count()
+        # Cached so validation can reuse the rows without re-reading the output
+        filtered_df = (
+            df.filter(col(CORRUPT_RECORD_COLUMN).isNull())
+            .drop(CORRUPT_RECORD_COLUMN)
+            .na.drop(subset=["ImageID"])
+            .cache()
+        )
         logger.info(f"Filtered row count: {filtered_rows}")
-        logger.info(f"Removed {total_rows - filtered_rows} rows with null ImageID")
+        logger.info(f"Removed {removed_rows} rows with null ImageID")
         
         # Write to Parquet
         logger.info(f"Writing Parquet to {output_path}")
-        filtered_df.write.mode("overwrite").parquet(output_path)
+        # Coalesce so the small input splits do not become many tiny part files
+        filtered_df.coalesce(os.cpu_count() or 1).write.mode("overwrite").parquet(output_path)
+        
+        stats = {
+            "initial_count": total_rows,
+            "transformed_count": filtered_rows,
+            "filtered_count": removed_rows + malformed_rows,
+            "malformed_count": malformed_rows,
+        }
         
         logger.info("ETL process completed successfully")
-        return spark, output_path
+        return spark, output_path, stats, filtered_df
     
     except Exception as e:
         logger.error(f"Error during ETL process: {str(e)}")
@@ -5,8 +5,12 @@ import os
 import sys
 import logging
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime
 
+from etl.csv_runner import SAMPLE_SIZE, PARQUET_ROW_GROUP_SIZE
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -14,6 +18,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of CSV rows held in memory at a time
+CHUNK_SIZE = 100_000
+
 def run_pandas_etl(input_path=None, output_path=None):
     """
     Run a simplified ETL pipeline using pandas.
@@ -50,38 +57,49 @@ def run_pandas_etl(input_path=None, output_path=None):
     logger.info(f"Output path: {output_path}")
     
     try:
-        # Read input data
-        logger.info("Reading input data")
-        df = pd.read_csv(input_path)
+        # Stream input data in chunks and append each to a single Parquet file
+        logger.info("Reading, transforming and writing data in chunks")
+        initial_count = 0
+        transformed_count = 0
+        sample_rows = []
+        writer = None
         
-        initial_count = len(df)
-        logger.info(f"Initial row count: {initial_count}")
+        try:
+            for chunk in pd.read_csv(input_path, chunksize=CHUNK_SIZE, dtype=str):
+                if writer is None:
+                    schema = pa.schema([(name, pa.string()) for name in chunk.columns])
+                    logger.info(f"Writing output data to {output_path}")
+                    writer = pq.ParquetWriter(
+                        output_path,
+                        schema,
+                        compression='zstd',
+                        compression_level=1
+                    )
+                
+                initial_count += len(chunk)
+                
+                # Transform: Filter out rows with null ImageID
+                chunk = chunk.dropna(subset=['ImageID'])
+                transformed_count += len(chunk)
+                
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=False),
+                    row_group_size=PARQUET_ROW_GROUP_SIZE
+                )
+                
+                # Get a sample of rows for preview
+                if len(sample_rows) < SAMPLE_SIZE:
+                    sample_rows.extend(
+                        chunk.head(SAMPLE_SIZE - len(sample_rows)).to_dict(orient='records')
+                    )
+        finally:
+            if writer is not None:
+                writer.close()
         
-        # Transform: Filter out rows with null ImageID
-        logger.info("Transforming data")
-        df = df.dropna(subset=['ImageID'])
-        
-        transformed_count = len(df)
+        logger.info(f"Initial row count: {initial_count}")
         logger.info(f"Row count after transformation: {transformed_count}")
         logger.info(f"Filtered out {initial_count - transformed_count} rows with null ImageID")
         
-        # Write output data
-        logger.info(f"Writing output data to {output_path}")
-        df.to_parquet(output_path, index=False)
-        
-        # Basic validation
-        logger.info("Validating output data")
-        validation_df = pd.read_parquet(output_path)
-        validation_count = len(validation_df)
-        logger.info(f"Validated row count: {validation_count}")
-        
-        # Check that row counts match
-        if validation_count != transformed_count:
-            logger.warning(f"Row count mismatch: {transformed_count} vs {validation_count}")
-        
-        # Get a sample of rows for preview
-        sample_rows = validation_df.head(5).to_dict(orient='records')
-        
         logger.info(f"ETL pipeline completed at {datetime.now()}")
         
         return {
@@ -91,7 +109,6 @@ def run_pandas_etl(input_path=None, output_path=None):
                 "initial_count": initial_count,
                 "transformed_count": transformed_count,
                 "filtered_count": initial_count - transformed_count,
-                "validated_count": validation_count
             },
             "sample_rows": sample_rows,
             "output_path": output_path
@@ -4,6 +4,7 @@ Simple ETL runner without Prefect dependency.
 import os
 import sys
 import logging
+import argparse
 from datetime import datetime
 
 # Ensure the project root is in the Python path
@@ -22,13 +23,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_etl_pipeline(input_path=None, output_path=None):
+def run_etl_pipeline(input_path=None, output_path=None, build_docs=False):
     """
     Run the ETL pipeline without Prefect.
     
     Args:
         input_path (str, optional): Path to input CSV file
         output_path (str, optional): Path to write Parquet output
+        build_docs (bool, optional): Build Great Expectations data docs even if
+            validation passes
     
     Returns:
         bool: True if the pipeline runs successfully
@@ -47,7 +50,8 @@ def run_etl_pipeline(input_path=None, output_path=None):
     try:
         # Run ETL
         logger.info("Starting ETL process")
-        spark_session, output_path = ingest(input_path, output_path)
+        spark_session, output_path, stats, df = ingest(input_path, output_path)
+        logger.info(f"ETL statistics: {stats}")
         
         # Setup expectations
         logger.info("Setting up Great Expectations")
@@ -59,7 +63,9 @@ def run_etl_pipeline(input_path=None, output_path=None):
             output_path,
             spark_session,
             context,
-            suite_name
+            suite_name,
+            df=df,
+            build_docs=build_docs
         )
         
         if not validation_result.success:
@@ -80,4 +86,8 @@ def run_etl_pipeline(input_path=None, output_path=None):
 
 if __name__ == "__main__":
     # When run directly, execute the ETL pipeline
-    run_etl_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the ETL pipeline")
+    parser.add_argument("--build-docs", action="store_true",
+                        help="Build Great Expectations data docs even if validation passes")
+    args = parser.parse_args()
+    run_etl_pipeline(build_docs=args.build_docs)
\ No newline at end of file
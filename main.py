@@ -1,7 +1,34 @@
-from flask import Flask, render_template_string, redirect, url_for, jsonify
+from flask import Flask, Response, redirect, url_for, request, send_from_directory
+import io
 import os
+import csv
+import copy
+import gzip
+import time
+import uuid
+import hashlib
 import logging
 import json
+import functools
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+from etl.csv_runner import run_csv_etl
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +38,30 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
 
+# Input file processed by the ETL pipeline
+INPUT_PATH = "data/labels.csv"
+
+# Stable alias of the most recent ETL output, maintained by run_csv_etl
+LATEST_OUTPUT_PATH = "data/output/latest_processed.csv"
+
+# Most sample rows returned in an ETL result or a single /api/sample page
+SAMPLE_ROW_LIMIT = 50
+
+# State of background ETL jobs, kept on disk so that any server process can
+# report on a job started by another
+JOBS_DIR = "data/output/jobs"
+
+# Seconds a finished or abandoned job is kept before it is pruned
+JOB_MAX_AGE = 3600
+
+# Background ETL runs go through a single thread per server process. No
+# thread is started until the first job, so this is safe to create before
+# Gunicorn forks its workers.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="etl-job")
+
+# Record start offsets of the latest output file, keyed by its identity
+_record_offsets_cache = {}
+
 # Enhanced HTML template with results display
 html_template = """
 <!DOCTYPE html>
@@ -39,7 +90,7 @@ html_template = """
                     </div>
                     <div class="card-body">
                         <h4>ETL Pipeline Status</h4>
-                        <div class="alert {{ alert_class }}" role="alert">
+                        <div id="status-alert" class="alert {{ alert_class }}" role="alert">
                             {{ status_message }}
                         </div>
                         
@@ -169,17 +220,57 @@ html_template = """
         const runButton = document.getElementById('run-etl-btn');
         const loadingIndicator = document.getElementById('loading');
         const resultsContainer = document.getElementById('results-container');
+        const statusAlert = document.getElementById('status-alert');
+        
+        // Escape a value for insertion into HTML
+        const escapes = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+        const esc = value => String(value).replace(/[&<>"']/g, c => escapes[c]);
+        
+        // Longest time to wait for a job; the server prunes jobs after this
+        const jobTimeoutMs = {{ job_timeout_ms }};
+        
+        // Decode an API response, rejecting error statuses and error payloads
+        function readApiResponse(response) {
+            return response.json().then(body => {
+                if (!response.ok || body.success === false) {
+                    throw new Error(body.error || `Request failed with status ${response.status}`);
+                }
+                return body;
+            });
+        }
+        
+        // Poll a background ETL job until it finishes and resolve with its
+        // result, or reject if the job is gone or takes too long
+        function waitForJob(jobId, deadline) {
+            return fetch(`/api/run-etl/status/${jobId}`)
+                .then(readApiResponse)
+                .then(job => {
+                    if (job.done) {
+                        return job.result;
+                    }
+                    if (Date.now() > deadline) {
+                        throw new Error('Timed out waiting for the ETL job to finish');
+                    }
+                    return new Promise(resolve => setTimeout(resolve, 500))
+                        .then(() => waitForJob(jobId, deadline));
+                });
+        }
         
-        runButton.addEventListener('click', function() {
+        function runEtl() {
             // Show loading indicator
             loadingIndicator.style.display = 'flex';
             runButton.disabled = true;
             
-            // Make AJAX request
-            fetch('/api/run-etl')
-                .then(response => response.json())
+            // Start the ETL job and wait for it to finish
+            fetch('/api/run-etl', {method: 'POST'})
+                .then(readApiResponse)
+                .then(job => waitForJob(job.job_id, Date.now() + jobTimeoutMs))
                 .then(data => {
                     if (data.success) {
+                        // Update status
+                        statusAlert.className = 'alert alert-success';
+                        statusAlert.textContent = `ETL completed successfully! Processed ${data.statistics.transformed_count} records (filtered ${data.statistics.filtered_count}). Output: ${data.output_path}`;
+                        
                         // Update results
                         document.getElementById('initial-count').textContent = data.statistics.initial_count;
                         document.getElementById('processed-count').textContent = data.statistics.transformed_count;
@@ -188,121 +279,314 @@ html_template = """
                         document.getElementById('timestamp').textContent = new Date(data.timestamp).toLocaleString();
                         
                         // Create sample data table
-                        if (data.sample_rows && data.sample_rows.length > 0) {
-                            const sampleHeader = document.getElementById('sample-header');
-                            const sampleBody = document.getElementById('sample-body');
-                            
-                            // Clear previous data
-                            sampleHeader.innerHTML = '';
-                            sampleBody.innerHTML = '';
+                        if (data.sample_rows && data.sample_rows.rows.length > 0) {
+                            const {columns, rows} = data.sample_rows;
                             
-                            // Create header
-                            const headerRow = document.createElement('tr');
-                            const firstRow = data.sample_rows[0];
-                            Object.keys(firstRow).forEach(key => {
-                                const th = document.createElement('th');
-                                th.textContent = key;
-                                headerRow.appendChild(th);
-                            });
-                            sampleHeader.appendChild(headerRow);
-                            
-                            // Create body rows
-                            data.sample_rows.forEach(row => {
-                                const tr = document.createElement('tr');
-                                Object.values(row).forEach(value => {
-                                    const td = document.createElement('td');
-                                    td.textContent = value;
-                                    tr.appendChild(td);
-                                });
-                                sampleBody.appendChild(tr);
-                            });
+                            // Build the header and body markup as strings and
+                            // replace each section with a single DOM write
+                            document.getElementById('sample-header').innerHTML =
+                                '<tr>' + columns.map(col => `<th>${esc(col)}</th>`).join('') + '</tr>';
+                            document.getElementById('sample-body').innerHTML = rows.map(row =>
+                                '<tr>' + row.map(value => `<td>${esc(value)}</td>`).join('') + '</tr>'
+                            ).join('');
                         }
                         
                         // Show results container
                         resultsContainer.style.display = 'block';
                     } else {
-                        alert('ETL process failed: ' + data.error);
+                        statusAlert.className = 'alert alert-danger';
+                        statusAlert.textContent = 'ETL process failed. Error: ' + data.error;
                     }
                 })
                 .catch(error => {
                     console.error('Error:', error);
-                    alert('An error occurred while running the ETL process. Please check the console for details.');
+                    alert('An error occurred while running the ETL process: ' + error.message);
                 })
                 .finally(() => {
                     // Hide loading indicator
                     loadingIndicator.style.display = 'none';
                     runButton.disabled = false;
                 });
-        });
+        }
+        
+        runButton.addEventListener('click', runEtl);
+        
+        // /run-etl redirects here with ?run=1 to start a run on page load
+        if (new URLSearchParams(window.location.search).get('run') === '1') {
+            history.replaceState(null, '', window.location.pathname);
+            runEtl();
+        }
     });
     </script>
 </body>
 </html>
 """
 
+# Compile the template once instead of on every request
+_INDEX_TPL = app.jinja_env.from_string(html_template)
+
+# The default page never changes, so render it once as well and write it to
+# the static folder where it can be served as a plain file
+_INDEX_HTML = _INDEX_TPL.render(
+    alert_class="alert-info",
+    status_message="ETL pipeline ready to run.",
+    job_timeout_ms=JOB_MAX_AGE * 1000
+)
+os.makedirs(app.static_folder, exist_ok=True)
+_INDEX_BYTES = _INDEX_HTML.encode("utf-8")
+
+# Compress the page once, in order of preference, so requests only pick a file
+_INDEX_VARIANTS = {}
+if brotli is not None:
+    _INDEX_VARIANTS["br"] = ("index.html.br", brotli.compress(_INDEX_BYTES, quality=11))
+_INDEX_VARIANTS["gzip"] = ("index.html.gz", gzip.compress(_INDEX_BYTES, compresslevel=9))
+_INDEX_VARIANTS["identity"] = ("index.html", _INDEX_BYTES)
+
+# Write each variant and remember its file name and content hash, which is
+# used as the variant's ETag. Files are replaced atomically so a worker that
+# is already serving them never sends a truncated page.
+_INDEX_FILES = {}
+for _encoding, (_name, _data) in _INDEX_VARIANTS.items():
+    _path = os.path.join(app.static_folder, _name)
+    _tmp_path = f"{_path}.{os.getpid()}.tmp"
+    with open(_tmp_path, "wb") as f:
+        f.write(_data)
+    os.replace(_tmp_path, _path)
+    _INDEX_FILES[_encoding] = (_name, hashlib.sha256(_data).hexdigest())
+
+# Seconds browsers may reuse the index page before revalidating it
+INDEX_MAX_AGE = 60
+
+def _input_key():
+    # Identify the current version of the input file by mtime and size
+    try:
+        stat = os.stat(INPUT_PATH)
+    except OSError:
+        return 0, 0
+    return stat.st_mtime_ns, stat.st_size
+
+def _columnar(rows):
+    # Send the column names once instead of repeating them in every row
+    columns = list(rows[0]) if rows else []
+    return {
+        "columns": columns,
+        "rows": [[row[col] for col in columns] for row in rows]
+    }
+
+@functools.lru_cache(maxsize=4)
+def _cached_run(mtime_ns, size):
+    # Callers get a deep copy from _run_etl, so the cached result is never modified
+    result = run_csv_etl(INPUT_PATH)
+    if "sample_rows" in result:
+        result["sample_rows"] = _columnar(result["sample_rows"][:SAMPLE_ROW_LIMIT])
+    return result
+
+def _run_etl():
+    # Reuse the previous result while the input file is unchanged
+    key = _input_key()
+    result = _cached_run(*key)
+    if result["success"] and not os.path.exists(result["output_path"]):
+        # The output was deleted since it was cached, so produce it again
+        _cached_run.cache_clear()
+        result = _cached_run(*key)
+    if not result["success"]:
+        # Do not cache failures so the next request retries
+        _cached_run.cache_clear()
+    return copy.deepcopy(result)
+
+def _write_job(job_id, state):
+    # Replace the job file atomically so readers never see a partial write
+    path = os.path.join(JOBS_DIR, f"{job_id}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def _prune_jobs():
+    # Remove job files that have not been updated for JOB_MAX_AGE seconds
+    cutoff = time.time() - JOB_MAX_AGE
+    with os.scandir(JOBS_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                # Already removed by another process
+                pass
+
+def _run_job(job_id):
+    try:
+        logger.info("Starting ETL job %s", job_id)
+        result = _run_etl()
+    except Exception as e:
+        logger.exception("Error running ETL job %s", job_id)
+        result = {
+            "success": False,
+            "error": str(e)
+        }
+    _write_job(job_id, {"done": True, "result": result})
+
+def _record_offsets(f, key):
+    # Byte offsets where each CSV record starts, plus the end of the data.
+    # Computed once per version of the file and reused for every page.
+    offsets = _record_offsets_cache.get(key)
+    if offsets is not None:
+        return offsets
+    
+    # A newline inside a quoted field does not end the record; it is quoted
+    # while an odd number of quote characters has been seen
+    offsets = array('Q', [0])
+    position = 0
+    quotes = 0
+    f.seek(0)
+    for line in f:
+        position += len(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            offsets.append(position)
+    if offsets[-1] != position:
+        offsets.append(position)
+    
+    _record_offsets_cache.clear()
+    _record_offsets_cache[key] = offsets
+    return offsets
+
+def _payload(obj, status=200):
+    # Clients that prefer MessagePack get it when ormsgpack is installed
+    if ormsgpack is not None:
+        mimetype = request.accept_mimetypes.best_match(
+            ["application/json", "application/msgpack"],
+            default="application/json"
+        )
+        if mimetype == "application/msgpack":
+            response = Response(ormsgpack.packb(obj), status=status, mimetype=mimetype)
+            response.vary.add("Accept")
+            return response
+    
+    # Serialise straight to bytes with orjson when it is installed
+    if orjson is not None:
+        body = orjson.dumps(obj)
+    else:
+        body = json.dumps(obj)
+    response = Response(body, status=status, mimetype="application/json")
+    if ormsgpack is not None:
+        response.vary.add("Accept")
+    return response
+
 @app.route('/')
 def index():
-    return render_template_string(
-        html_template,
-        alert_class="alert-info",
-        status_message="ETL pipeline ready to run."
+    # Send the smallest variant the client accepts
+    for encoding, (name, etag) in _INDEX_FILES.items():
+        if encoding == "identity" or request.accept_encodings[encoding]:
+            break
+    
+    # A matching If-None-Match gets an empty 304 response
+    response = send_from_directory(
+        app.static_folder,
+        name,
+        download_name="index.html",
+        etag=etag,
+        max_age=INDEX_MAX_AGE
     )
+    response.cache_control.must_revalidate = True
+    if encoding != "identity":
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    return response
 
-@app.route('/api/run-etl')
-def api_run_etl():
+@app.route('/api/sample')
+def sample():
+    # Page through the rows of the latest ETL output without loading it all
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', SAMPLE_ROW_LIMIT, type=int), 1), SAMPLE_ROW_LIMIT)
+    
     try:
-        from etl.csv_runner import run_csv_etl
-        
-        # Run ETL process
-        logger.info("Starting ETL process")
-        result = run_csv_etl()
+        f = open(LATEST_OUTPUT_PATH, 'rb')
+    except FileNotFoundError:
+        return _payload({
+            "success": False,
+            "error": "No ETL output available yet"
+        }, 404)
+    
+    # Pages are read with pread rather than through an mmap, which would
+    # fault with SIGBUS if the file were truncated while mapped
+    with f:
+        stat = os.fstat(f.fileno())
+        offsets = _record_offsets(f, (stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        if len(offsets) < 2:
+            return _payload({"columns": [], "rows": [], "offset": offset, "total": 0})
         
-        if result["success"]:
-            logger.info("ETL process completed successfully")
-            return jsonify(result)
-        else:
-            logger.error(f"ETL process failed: {result['error']}")
-            return jsonify(result), 500
+        # Record 0 is the header; data rows follow
+        total = len(offsets) - 2
+        start = min(offset, total) + 1
+        end = min(offset + limit, total) + 1
+        header = os.pread(f.fileno(), offsets[1], 0).decode()
+        page = os.pread(f.fileno(), offsets[end] - offsets[start], offsets[start]).decode()
     
-    except Exception as e:
-        logger.exception("Error running ETL process")
-        return jsonify({
+    return _payload({
+        "columns": next(csv.reader(io.StringIO(header, newline='')), []),
+        "rows": list(csv.reader(io.StringIO(page, newline=''))),
+        "offset": offset,
+        "total": total
+    })
+
+@app.route('/api/run-etl', methods=['POST'])
+def start_etl_job():
+    # Queue an ETL run and return straight away; poll etl_job_status for
+    # the result
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    _prune_jobs()
+    
+    job_id = str(uuid.uuid4())
+    _write_job(job_id, {"done": False})
+    _executor.submit(_run_job, job_id)
+    return _payload({"job_id": job_id}, 202)
+
+@app.route('/api/run-etl/status/<uuid:job_id>')
+def etl_job_status(job_id):
+    try:
+        with open(os.path.join(JOBS_DIR, f"{job_id}.json")) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return _payload({
             "success": False,
-            "error": str(e)
-        }), 500
+            "error": f"Unknown job {job_id}"
+        }, 404)
+    
+    state["job_id"] = str(job_id)
+    return _payload(state)
 
+@app.route('/api/run-etl')
 @app.route('/run-etl')
 def run_etl():
+    # Browsers are sent to the cached index page, which runs the ETL through
+    # the API so the status page is never rendered per request
+    if not (
+        request.path.startswith("/api/")
+        or request.accept_mimetypes.best in ("application/json", "application/msgpack")
+    ):
+        return redirect(url_for('index', run=1))
+    
     try:
-        from etl.csv_runner import run_csv_etl
-        
         # Run ETL process
         logger.info("Starting ETL process")
-        result = run_csv_etl()
-        
-        if result["success"]:
-            logger.info("ETL process completed successfully")
-            stats = result["statistics"]
-            message = f"ETL completed successfully! Processed {stats['transformed_count']} records (filtered {stats['filtered_count']}). Output: {result['output_path']}"
-            return render_template_string(
-                html_template,
-                alert_class="alert-success",
-                status_message=message
-            )
-        else:
-            logger.error(f"ETL process failed: {result['error']}")
-            return render_template_string(
-                html_template,
-                alert_class="alert-danger",
-                status_message=f"ETL process failed. Error: {result['error']}"
-            )
+        result = _run_etl()
     except Exception as e:
         logger.exception("Error running ETL process")
-        return render_template_string(
-            html_template,
-            alert_class="alert-danger",
-            status_message=f"Error running ETL process: {str(e)}"
-        )
+        return _payload({
+            "success": False,
+            "error": str(e)
+        }, 500)
+    
+    if result["success"]:
+        logger.info("ETL process completed successfully")
+        return _payload(result)
+    
+    logger.error("ETL process failed: %s", result["error"])
+    return _payload(result, 500)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # Debug mode and its reloader import the app twice, so only enable them
+    # when asked to with FLASK_DEBUG=1
+    debug = os.environ.get("FLASK_DEBUG") == "1"
+    app.run(host="0.0.0.0", port=5000, debug=debug, use_reloader=debug)
\ No newline at end of file
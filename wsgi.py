@@ -0,0 +1,7 @@
+"""
+WSGI entry point for running the web interface under a production server.
+
+Example:
+    gunicorn --preload -w 4 -k gthread --threads 4 -b 0.0.0.0:5000 wsgi:app
+"""
+from main import app